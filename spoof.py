@@ -24,17 +24,37 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import contextlib
 import enum
+import itertools
 import logging
+import math
 import os
+import queue
 import signal
 import time
-import uuid
+from array import array
+from bisect import bisect_left, insort
 from collections import deque
 from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import Deque, Dict, List, Literal, Optional
+from typing import (
+    Awaitable,
+    Callable,
+    Collection,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from spoof_metrics import CANCELLED, FILLED, SIDE_BUY, SIDE_SELL, rolling_cancel_ratio
 
 ###############################################################################
 # Logging
@@ -47,24 +67,31 @@ logging.basicConfig(
 )
 log = logging.getLogger("spoof-sim")
 
+# Prices and sizes are held as integer ticks / lots inside the book so that
+# compares are exact; floats only appear at the API boundary.
+PRICE_TICK = 100  # ticks per quote unit (cents)
+SIZE_LOT = 1_000_000  # lots per base unit
+
 ###############################################################################
 # Common data structures
 ###############################################################################
 # Define market side enum and Order dataclass for tracking limit orders and fills.
-class Side(str, enum.Enum):
-    BUY = "buy"
-    SELL = "sell"
+# Side is an int enum so side checks are integer compares; its values double as
+# the side codes in SimExchange's order columns and spoof_metrics.
+class Side(enum.IntEnum):
+    BUY = SIDE_BUY
+    SELL = SIDE_SELL
 
 
 @dataclass(slots=True)
 class Order:
     id: str
     side: Side
-    price: float
-    size: float
-    filled: float = 0.0
+    price: int  # ticks
+    size: int  # lots
+    filled: int = 0
     status: Literal["open", "filled", "cancelled"] = "open"
-    ts: float = field(default_factory=time.time)
+    ts: int = field(default_factory=time.monotonic_ns)  # monotonic ns
 
 
 ###############################################################################
@@ -82,83 +109,390 @@ class Exchange:
 
     async def connect(self) -> None: ...
 
-    async def get_top(self, symbol: str) -> Dict[str, float]: ...
+    async def get_top(
+        self, symbol: str, exclude: Collection[str] = ()
+    ) -> Tuple[float, float]: ...
 
     async def place_limit(
-        self, symbol: str, side: Side, price: float, size: float, cid: str
+        self,
+        symbol: str,
+        side: Side,
+        price: float,
+        size: float,
+        cid: str,
+        ts: Optional[int] = None,
     ) -> str: ...
 
+    async def place_limit_batch(
+        self,
+        symbol: str,
+        side: Side,
+        prices: List[float],
+        sizes: List[float],
+        cids: List[str],
+        ts: Optional[int] = None,
+    ) -> List[str]: ...
+
     async def cancel(self, order_id: str) -> None: ...
 
+    async def cancel_batch(self, order_ids: List[str]) -> None: ...
+
 
 ###############################################################################
 # 1) Simulation exchange
 ###############################################################################
+class _OrderTable:
+    """
+    Resting orders packed into typed columns indexed by slot number – the
+    stdlib analogue of a structured array of POD order records.  Price
+    levels hold slot ints, and slots of orders that leave the book are
+    recycled through a free list.  ``Order`` objects exist only at the API
+    boundary.
+    """
+
+    __slots__ = ("ids", "side", "price", "size", "filled", "ts", "_free")
+
+    def __init__(self) -> None:
+        self.ids: List[str] = []
+        self.side = array("b")
+        self.price = array("q")
+        self.size = array("q")
+        self.filled = array("q")
+        self.ts = array("q")
+        self._free: List[int] = []
+
+    def alloc(self, order: Order) -> int:
+        # Copy `order` into a free (or new) slot and return the slot number.
+        if self._free:
+            slot = self._free.pop()
+            self.ids[slot] = order.id
+            self.side[slot] = order.side
+            self.price[slot] = order.price
+            self.size[slot] = order.size
+            self.filled[slot] = order.filled
+            self.ts[slot] = order.ts
+        else:
+            slot = len(self.ids)
+            self.ids.append(order.id)
+            self.side.append(order.side)
+            self.price.append(order.price)
+            self.size.append(order.size)
+            self.filled.append(order.filled)
+            self.ts.append(order.ts)
+        return slot
+
+    def free(self, slot: int) -> None:
+        self.ids[slot] = ""
+        self._free.append(slot)
+
+    def to_order(self, slot: int) -> Order:
+        # Materialise a resting order for callers outside the engine.
+        return Order(
+            id=self.ids[slot],
+            side=Side(self.side[slot]),
+            price=self.price[slot],
+            size=self.size[slot],
+            filled=self.filled[slot],
+            ts=self.ts[slot],
+        )
+
+
+class _PriceLevels:
+    """
+    Price → FIFO of resting order slots, keys kept sorted with the best level
+    last (a stdlib stand‑in for ``sortedcontainers.SortedDict``), so reading
+    or popping the best level is O(1).  Adding or dropping a level is an
+    O(log L) search plus a list insert/delete that moves the keys behind it.
+    Bids are keyed by *negated* price so both sides iterate best‑first.
+    """
+
+    __slots__ = ("_levels", "_keys")
+
+    def __init__(self) -> None:
+        self._levels: Dict[int, Deque[int]] = {}
+        # Negated keys, ascending: the best (lowest) key sits at the end.
+        self._keys: List[int] = []
+
+    def __bool__(self) -> bool:
+        return bool(self._keys)
+
+    def __iter__(self) -> Iterator[Tuple[int, Deque[int]]]:
+        # (key, FIFO) pairs, best level first.
+        for neg in reversed(self._keys):
+            yield -neg, self._levels[-neg]
+
+    def level(self, key: int) -> Deque[int]:
+        # Return the FIFO at `key`, creating it on first use.
+        q = self._levels.get(key)
+        if q is None:
+            q = self._levels[key] = deque()
+            insort(self._keys, -key)
+        return q
+
+    def get(self, key: int) -> Optional[Deque[int]]:
+        return self._levels.get(key)
+
+    def peekitem(self) -> Tuple[int, Deque[int]]:
+        # Best (key, FIFO) pair; caller checks the book is non‑empty first.
+        key = -self._keys[-1]
+        return key, self._levels[key]
+
+    def popitem(self) -> Tuple[int, Deque[int]]:
+        # Remove and return the best level: O(1), nothing behind it to shift.
+        key = -self._keys.pop()
+        return key, self._levels.pop(key)
+
+    def discard(self, key: int) -> None:
+        # Remove the level at `key` (typically once its FIFO has emptied).
+        if self._levels.pop(key, None) is not None:
+            del self._keys[bisect_left(self._keys, -key)]
+
+
 class SimExchange(Exchange):
     def __init__(self) -> None:
-        # Initialize in-memory order book for buy/sell sides and trade history list.
-        self.book: Dict[Side, Deque[Order]] = {
-            Side.BUY: deque(),
-            Side.SELL: deque(),
-        }
-        self.trades: List[Dict] = []
+        # Price-level books of order slots per side, cached top-of-book (None =
+        # empty side), the packed resting-order table with an id → slot index
+        # for O(1) cancel lookups, plus typed columns for the trade
+        # history (price ticks, size lots, ts) and for the order log of orders
+        # that left the book (retirement ts, side, final status) fed to
+        # spoof_metrics.
+        self.bids = _PriceLevels()
+        self.asks = _PriceLevels()
+        self._best_bid: Optional[float] = None
+        self._best_ask: Optional[float] = None
+        self._orders = _OrderTable()
+        self.orders_by_id: Dict[str, int] = {}
+        self._trades_px = array("q")
+        self._trades_sz = array("q")
+        self._trades_ts = array("q")
+        self._done_ts = array("q")
+        self._done_side = array("b")
+        self._done_status = array("b")
 
     async def connect(self) -> None:
         # No external connection required; simulation ready immediately.
         log.info("SimExchange ready.")
 
-    async def get_top(self, _symbol: str) -> Dict[str, float]:
-        # Return best bid/ask prices, use fallback quotes if book is empty.
-        bid = self.book[Side.BUY][0].price if self.book[Side.BUY] else 49_999.5
-        ask = self.book[Side.SELL][0].price if self.book[Side.SELL] else 50_000.5
-        return {"bid": bid, "ask": ask}
+    async def get_top(
+        self, _symbol: str, exclude: Collection[str] = ()
+    ) -> Tuple[float, float]:
+        # Return cached (bid, ask) prices, use fallback quotes if book is empty.
+        # `exclude` leaves the caller's own resting orders out of the quote,
+        # which needs a walk down the levels instead of the cached read.
+        if exclude:
+            bid_key = self._best_key(self.bids, exclude)
+            ask_key = self._best_key(self.asks, exclude)
+            bid = -bid_key / PRICE_TICK if bid_key is not None else 49_999.5
+            ask = ask_key / PRICE_TICK if ask_key is not None else 50_000.5
+            return bid, ask
+        bid = self._best_bid if self._best_bid is not None else 49_999.5
+        ask = self._best_ask if self._best_ask is not None else 50_000.5
+        return bid, ask
 
     async def place_limit(
-        self, symbol: str, side: Side, price: float, size: float, cid: str
+        self,
+        symbol: str,
+        side: Side,
+        price: float,
+        size: float,
+        cid: str,
+        ts: Optional[int] = None,
     ) -> str:
-        # Place a limit order into the book, then attempt to match orders.
-        order = Order(id=cid, side=side, price=price, size=size)
-        self._insert(order)
-        self._match()
-        return order.id
+        # `ts` lets callers stamp a whole cycle with one clock read.
+        if ts is None:
+            ts = time.monotonic_ns()
+        return self._place(side, price, size, cid, ts)
+
+    async def place_limit_batch(
+        self,
+        symbol: str,
+        side: Side,
+        prices: List[float],
+        sizes: List[float],
+        cids: List[str],
+        ts: Optional[int] = None,
+    ) -> List[str]:
+        # Place several orders in one call, without yielding between them; the
+        # whole batch shares one timestamp.
+        if ts is None:
+            ts = time.monotonic_ns()
+        return [
+            self._place(side, px, sz, cid, ts)
+            for px, sz, cid in zip(prices, sizes, cids)
+        ]
 
     async def cancel(self, order_id: str) -> None:
-        # Cancel an open order by its client id if present in the book.
-        for q in self.book.values():
-            for o in list(q):
-                if o.id == order_id and o.status == "open":
-                    o.status = "cancelled"
-                    q.remove(o)
-                    return
+        self._cancel(order_id, time.monotonic_ns())
+
+    async def cancel_batch(self, order_ids: List[str]) -> None:
+        # Cancel several orders in one call, without yielding between them.
+        # Cancelled slots are swept out of each touched level in a single pass
+        # instead of one deque.remove (a scan of the level) per order.
+        now = time.monotonic_ns()
+        doomed: Dict[Tuple[_PriceLevels, int], set] = {}
+        for oid in order_ids:
+            slot = self.orders_by_id.pop(oid, None)
+            if slot is None:
+                continue
+            doomed.setdefault(self._level_of(slot), set()).add(slot)
+            self._retire(slot, CANCELLED, now)
+        emptied = False
+        for (levels, key), slots in doomed.items():
+            q = levels.get(key)
+            kept = [s for s in q if s not in slots]
+            if kept:
+                q.clear()
+                q.extend(kept)
+            else:
+                levels.discard(key)
+                emptied = True
+        if emptied:
+            self._refresh_bid()
+            self._refresh_ask()
+
+    def get_order(self, order_id: str) -> Optional[Order]:
+        # Snapshot of a resting order, or None once it has left the book.
+        slot = self.orders_by_id.get(order_id)
+        return None if slot is None else self._orders.to_order(slot)
+
+    def trades_view(self, start: int = 0) -> Tuple[array, array, array]:
+        # Copies of the trade columns (price ticks, size lots, ts ns) from row
+        # `start` on; a reader that keeps `start += len(px)` as a cursor only
+        # copies fills it has not seen.  The live columns are never handed
+        # out: an array.array with a buffer export alive (memoryview,
+        # np.frombuffer) raises BufferError on the next append.
+        return self._trades_px[start:], self._trades_sz[start:], self._trades_ts[start:]
+
+    def orders_view(self, since: Optional[int] = None) -> Tuple[array, array, array]:
+        # Snapshot of the order-log columns (ts ns, side, status) for detectors,
+        # optionally only rows retired at or after `since`.  Rows are in ts
+        # order, so the start is found by bisection.  The log only holds what
+        # trim_order_log has not dropped: run_strategy keeps the last --window.
+        i = 0 if since is None else bisect_left(self._done_ts, since)
+        return self._done_ts[i:], self._done_side[i:], self._done_status[i:]
+
+    def trim_order_log(self, before: int) -> None:
+        # Drop order-log rows retired before `before` (keeps the log bounded).
+        i = bisect_left(self._done_ts, before)
+        del self._done_ts[:i]
+        del self._done_side[:i]
+        del self._done_status[:i]
 
     # ---------- internal ----------
-    def _insert(self, order: Order) -> None:
-        # Insert order into sorted deque: buys highest-first, sells lowest-first.
-        q = self.book[order.side]
-        cmp = (lambda p1, p2: p1 > p2) if order.side == Side.BUY else (lambda p1, p2: p1 < p2)
-        idx = 0
-        while idx < len(q) and cmp(q[idx].price, order.price):
-            idx += 1
-        q.insert(idx, order)
-
-    def _match(self) -> None:
-        # Continuously match top buy/sell orders when bid >= ask, record trades.
-        while self.book[Side.BUY] and self.book[Side.SELL]:
-            buy = self.book[Side.BUY][0]
-            sell = self.book[Side.SELL][0]
-            if buy.price < sell.price:
+    def _place(self, side: Side, price: float, size: float, cid: str, ts: int) -> str:
+        # Convert to ticks/lots and submit to the book (match, then rest).
+        px_ticks = round(price * PRICE_TICK)
+        qty_lots = round(size * SIZE_LOT)
+        order = Order(id=cid, side=side, price=px_ticks, size=qty_lots, ts=ts)
+        self._submit(order)
+        return order.id
+
+    def _cancel(self, order_id: str, ts: int) -> None:
+        # Cancel an open order by its client id if present in the book.
+        slot = self.orders_by_id.pop(order_id, None)
+        if slot is None:
+            return
+        levels, key = self._level_of(slot)
+        q = levels.get(key)
+        q.remove(slot)
+        self._retire(slot, CANCELLED, ts)
+        if not q:
+            levels.discard(key)
+            if levels is self.bids:
+                self._refresh_bid()
+            else:
+                self._refresh_ask()
+
+    def _best_key(
+        self, levels: _PriceLevels, exclude: Collection[str]
+    ) -> Optional[int]:
+        # Key of the best level holding at least one order not in `exclude`.
+        ids = self._orders.ids
+        for key, q in levels:
+            for slot in q:
+                if ids[slot] not in exclude:
+                    return key
+        return None
+
+    def _level_of(self, slot: int) -> Tuple[_PriceLevels, int]:
+        # Book side and level key holding a resting order slot.
+        t = self._orders
+        if t.side[slot] == Side.BUY:
+            return self.bids, -t.price[slot]
+        return self.asks, t.price[slot]
+
+    def _submit(self, order: Order) -> None:
+        # Single state transition per order: match against the opposite side's
+        # best levels while it crosses, then rest any residual on its own side.
+        # Branch on side once; bids are keyed negated, so opposite keys cross
+        # when <= `limit` and the order's own level key is `-limit`.
+        if order.side == Side.BUY:
+            limit = order.price
+            same, opp = self.bids, self.asks
+            refresh_same, refresh_opp = self._refresh_bid, self._refresh_ask
+        else:
+            limit = -order.price
+            same, opp = self.asks, self.bids
+            refresh_same, refresh_opp = self._refresh_ask, self._refresh_bid
+        t = self._orders
+        traded = False
+        while order.filled < order.size and opp:
+            key, q = opp.peekitem()
+            if key > limit:
                 break
-            qty = min(buy.size - buy.filled, sell.size - sell.filled)
-            px = (buy.price + sell.price) / 2
-            self.trades.append({"price": px, "size": qty, "ts": time.time()})
-            buy.filled += qty
-            sell.filled += qty
-            if buy.filled >= buy.size:
-                buy.status = "filled"
-                self.book[Side.BUY].popleft()
-            if sell.filled >= sell.size:
-                sell.status = "filled"
-                self.book[Side.SELL].popleft()
+            slot = q[0]
+            qty = min(order.size - order.filled, t.size[slot] - t.filled[slot])
+            px = (order.price + t.price[slot]) >> 1
+            self._trades_px.append(px)
+            self._trades_sz.append(qty)
+            self._trades_ts.append(order.ts)
+            order.filled += qty
+            t.filled[slot] += qty
+            traded = True
+            if t.filled[slot] >= t.size[slot]:
+                q.popleft()
+                self.orders_by_id.pop(t.ids[slot], None)
+                self._retire(slot, FILLED, order.ts)
+                if not q:
+                    opp.popitem()
+        if traded:
+            refresh_opp()
+        if order.filled >= order.size:
+            order.status = "filled"
+            self._log_done(order.ts, order.side, FILLED)
+            return
+
+        # Rest the residual (time priority within level); refresh the cached
+        # top only when it improves its side.
+        improves = not same or -limit < same.peekitem()[0]
+        slot = t.alloc(order)
+        same.level(-limit).append(slot)
+        self.orders_by_id[order.id] = slot
+        if improves:
+            refresh_same()
+
+    def _retire(self, slot: int, status: int, ts: int) -> None:
+        # Log a resting order leaving the book at `ts` and recycle its slot.
+        t = self._orders
+        self._log_done(ts, t.side[slot], status)
+        t.free(slot)
+
+    def _log_done(self, ts: int, side: int, status: int) -> None:
+        # Append one row to the order log read by spoof_metrics.  A stale
+        # caller-supplied ts is clamped so the log stays sorted for bisection.
+        if self._done_ts and ts < self._done_ts[-1]:
+            ts = self._done_ts[-1]
+        self._done_ts.append(ts)
+        self._done_side.append(side)
+        self._done_status.append(status)
+
+    def _refresh_bid(self) -> None:
+        # Re-read the cached best bid after front levels were removed.
+        self._best_bid = -self.bids.peekitem()[0] / PRICE_TICK if self.bids else None
+
+    def _refresh_ask(self) -> None:
+        # Re-read the cached best ask after front levels were removed.
+        self._best_ask = self.asks.peekitem()[0] / PRICE_TICK if self.asks else None
 
 
 ###############################################################################
@@ -180,28 +514,75 @@ class LiveExchange(Exchange):
                 "implement real API calls at your own risk."
             )
 
-    async def get_top(self, symbol: str) -> Dict[str, float]:
-        # Replace with vendor SDK / REST call
+    async def get_top(
+        self, symbol: str, exclude: Collection[str] = ()
+    ) -> Tuple[float, float]:
+        # Replace with vendor SDK / REST call (subtracting own orders in `exclude`)
         raise NotImplementedError("Fill with venue top‑of‑book request")
 
     async def place_limit(
-        self, symbol: str, side: Side, price: float, size: float, cid: str
+        self,
+        symbol: str,
+        side: Side,
+        price: float,
+        size: float,
+        cid: str,
+        ts: Optional[int] = None,
     ) -> str:
         if self.paper:
-            log.debug(f"[DRY‑RUN] place {side} {size}@{price} cid={cid}")
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug(
+                    "[DRY‑RUN] place %s %s@%s cid=%s", side.name, size, price, cid
+                )
             return cid
         raise RuntimeError("Live order placement not implemented")
 
+    async def place_limit_batch(
+        self,
+        symbol: str,
+        side: Side,
+        prices: List[float],
+        sizes: List[float],
+        cids: List[str],
+        ts: Optional[int] = None,
+    ) -> List[str]:
+        # Replace with the venue's bulk‑order endpoint (one request for all legs).
+        if self.paper:
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug(
+                    "[DRY‑RUN] place_batch %s %s@%s cids=%s",
+                    side.name,
+                    sizes,
+                    prices,
+                    cids,
+                )
+            return list(cids)
+        raise RuntimeError("Live batch placement not implemented")
+
     async def cancel(self, order_id: str) -> None:
         if self.paper:
-            log.debug(f"[DRY‑RUN] cancel {order_id}")
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("[DRY‑RUN] cancel %s", order_id)
             return
         raise RuntimeError("Live cancel not implemented")
 
+    async def cancel_batch(self, order_ids: List[str]) -> None:
+        # Replace with the venue's mass‑cancel message (one request for all ids).
+        if self.paper:
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("[DRY‑RUN] cancel_batch %s", order_ids)
+            return
+        raise RuntimeError("Live batch cancel not implemented")
+
 
 ###############################################################################
 # Spoofing Scenario
 ###############################################################################
+# Client ids: per-process run tag + monotonic counter (cheap and reproducible).
+_cid_ctr = itertools.count()
+_run_tag = f"{os.getpid():x}"
+
+
 async def spoof_cycle(
     ex: Exchange,
     symbol: str,
@@ -210,32 +591,111 @@ async def spoof_cycle(
     price_offset: float,
     hold: float,
     exec_delay: float,
+    own: Optional[Set[str]] = None,
 ) -> None:
-    # Retrieve current top-of-book quotes.
-    top = await ex.get_top(symbol)
-    bid, ask = top["bid"], top["ask"]
+    # Retrieve current top-of-book quotes; one clock read stamps the spoof batch.
+    # `own` holds the spoof ids of cycles still in flight: they are left out of
+    # the quote, so overlapping cycles neither layer below nor sell into each
+    # other's spoofs, and this cycle's ids are registered there until cancelled.
+    now = time.monotonic_ns()
+    bid, ask = await ex.get_top(symbol, exclude=own or ())
     log.info("Top: bid %.2f | ask %.2f", bid, ask)
 
-    spoof_ids: List[str] = []
-    # Step 1: Place multiple spoof bid orders to create false buying pressure.
-    for i in range(layers):
-        px = bid - price_offset * (i + 1)
-        cid = f"sp_bid_{uuid.uuid4().hex[:8]}"
-        await ex.place_limit(symbol, Side.BUY, px, layer_size, cid)
-        spoof_ids.append(cid)
+    # Step 1: Place multiple spoof bid orders to create false buying pressure,
+    # all layer prices and ids built up front and sent as one batch.
+    spoof_pxs = [bid - price_offset * i for i in range(1, layers + 1)]
+    spoof_ids = [f"sp_bid_{_run_tag}_{next(_cid_ctr):x}" for _ in range(layers)]
+    if own is not None:
+        own.update(spoof_ids)
+    try:
+        await ex.place_limit_batch(
+            symbol, Side.BUY, spoof_pxs, [layer_size] * layers, spoof_ids, ts=now
+        )
 
-    await asyncio.sleep(exec_delay)
+        await asyncio.sleep(exec_delay)
 
-    # Step 2: Small pause, then submit a real order on the opposite side.
-    real_cid = f"real_{uuid.uuid4().hex[:8]}"
-    await ex.place_limit(symbol, Side.SELL, bid, 0.01, real_cid)
+        # Step 2: Small pause, then submit a real order on the opposite side.
+        real_cid = f"real_{_run_tag}_{next(_cid_ctr):x}"
+        await ex.place_limit(symbol, Side.SELL, bid, 0.01, real_cid)
 
-    # Step 3: Hold spoof orders for a period, then cancel them to avoid fills.
-    await asyncio.sleep(hold)
-    await asyncio.gather(*(ex.cancel(oid) for oid in spoof_ids))
+        # Step 3: Hold spoof orders for a period, then cancel them to avoid fills.
+        await asyncio.sleep(hold)
+        await ex.cancel_batch(spoof_ids)
+    finally:
+        if own is not None:
+            own.difference_update(spoof_ids)
     log.info("Cycle complete.")
 
 
+# Source template for make_spoof_cycle; must stay step-for-step in line with
+# spoof_cycle above (test_spoof.py checks the two against each other).
+_SPECIALIZED_CYCLE_SRC = """\
+async def spoof_cycle_specialized(ex, symbol, own=None):
+    now = time.monotonic_ns()
+    bid, ask = await ex.get_top(symbol, exclude=own or ())
+    log.info("Top: bid %.2f | ask %.2f", bid, ask)
+    spoof_pxs = [{pxs}]
+    spoof_ids = [{ids}]
+    if own is not None:
+        own.update(spoof_ids)
+    try:
+        await ex.place_limit_batch(
+            symbol, Side.BUY, spoof_pxs, [{sizes}], spoof_ids, ts=now
+        )
+        await asyncio.sleep({exec_delay!r})
+        real_cid = f"real_{{_run_tag}}_{{next(_cid_ctr):x}}"
+        await ex.place_limit(symbol, Side.SELL, bid, 0.01, real_cid)
+        await asyncio.sleep({hold!r})
+        await ex.cancel_batch(spoof_ids)
+    finally:
+        if own is not None:
+            own.difference_update(spoof_ids)
+    log.info("Cycle complete.")
+"""
+
+
+def make_spoof_cycle(
+    layers: int,
+    layer_size: float,
+    price_offset: float,
+    hold: float,
+    exec_delay: float,
+) -> Callable[[Exchange, str, Optional[Set[str]]], Awaitable[None]]:
+    # Partially evaluate spoof_cycle for a fixed CLI shape: the layer loop is
+    # unrolled and offsets, sizes and timings become literals in generated
+    # source (LOAD_CONST in the bytecode), leaving
+    # `async def (ex, symbol, own=None)` that only reads the live bid.
+    # repr() round-trips finite floats exactly; inf/nan have no literal form,
+    # so they are rejected here (the CLI already refuses them).
+    values = (layer_size, price_offset, hold, exec_delay)
+    if not all(math.isfinite(v) for v in values):
+        raise ValueError(f"spoof cycle parameters must be finite, got {values}")
+    src = _SPECIALIZED_CYCLE_SRC.format(
+        pxs=", ".join(f"bid - {price_offset * i!r}" for i in range(1, layers + 1)),
+        ids=", ".join(['f"sp_bid_{_run_tag}_{next(_cid_ctr):x}"'] * layers),
+        sizes=", ".join([repr(float(layer_size))] * layers),
+        exec_delay=float(exec_delay),
+        hold=float(hold),
+    )
+    ns: Dict[str, object] = {}
+    exec(compile(src, "<spoof_cycle_specialized>", "exec"), globals(), ns)
+    return ns["spoof_cycle_specialized"]
+
+
+def report_metrics(ex: Exchange, window: float) -> None:
+    # Post-cycle detector hook: per-side cancel ratio over the trailing window.
+    # Only rows inside the window are copied out of the log, so the work per
+    # cycle depends on the window, not on how long the run has been going; the
+    # log itself is left alone.  The ratios are only logged, so skip the pass
+    # when INFO is filtered out.
+    if not isinstance(ex, SimExchange) or not log.isEnabledFor(logging.INFO):
+        return
+    window_ns = round(window * 1e9)
+    view = ex.orders_view(since=time.monotonic_ns() - window_ns)
+    bid_cr, ask_cr = rolling_cancel_ratio(*view, window_ns)
+    log.info("Cancel ratio (%gs): bid %.2f | ask %.2f", window, bid_cr, ask_cr)
+
+
 ###############################################################################
 # Runner helpers
 ###############################################################################
@@ -271,52 +731,148 @@ async def run_strategy(args):
         )
 
     await ex.connect()
+    cycle = make_spoof_cycle(
+        layers=args.layers,
+        layer_size=args.layer_size,
+        price_offset=args.offset,
+        hold=args.hold,
+        exec_delay=args.delay,
+    )
+
+    # Kick off a cycle every --pause seconds with up to --concurrency cycles in
+    # flight; the TaskGroup drains in-flight cycles on shutdown.  Waiting for a
+    # slot or for the next tick also wakes on shutdown, so a signal is never
+    # stuck behind a full pipeline.  `own` tracks in-flight spoof ids.
+    slots = asyncio.Semaphore(args.concurrency)
+    own: Set[str] = set()
+    async with cancellation_scope() as cancel_flag, asyncio.TaskGroup() as tg:
+        while await _acquire_or_cancel(slots, cancel_flag):
+            tg.create_task(_run_cycle(cycle, ex, args, slots, own))
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(cancel_flag.wait(), args.pause)
+
+
+async def _acquire_or_cancel(slots: asyncio.Semaphore, cancel: asyncio.Event) -> bool:
+    # Wait for a free cycle slot; False (holding no slot) once shutdown is set.
+    # cancel() on a pending task only schedules its cancellation, so whether
+    # the slot was taken is read from done() before cancelling anything.
+    acquire = asyncio.ensure_future(slots.acquire())
+    stop = asyncio.ensure_future(cancel.wait())
+    acquired = False
+    try:
+        await asyncio.wait((acquire, stop), return_when=asyncio.FIRST_COMPLETED)
+        acquired = acquire.done() and not cancel.is_set()
+    finally:
+        stop.cancel()
+        if not acquire.done():
+            acquire.cancel()
+        elif not acquired:
+            slots.release()
+    return acquired
 
-    async with cancellation_scope() as cancel_flag:
-        while not cancel_flag.is_set():
-            try:
-                await spoof_cycle(
-                    ex,
-                    symbol=args.symbol,
-                    layers=args.layers,
-                    layer_size=args.layer_size,
-                    price_offset=args.offset,
-                    hold=args.hold,
-                    exec_delay=args.delay,
-                )
-            except Exception as e:
-                log.exception("Cycle error: %s", e)
-                await asyncio.sleep(5.0)
-            await asyncio.sleep(args.pause)
+
+async def _run_cycle(
+    cycle: Callable[[Exchange, str, Optional[Set[str]]], Awaitable[None]],
+    ex: Exchange,
+    args,
+    slots: asyncio.Semaphore,
+    own: Set[str],
+) -> None:
+    # One pipeline task: run a cycle, feed the detector, then free its slot.
+    # Errors are logged (and back off) here so they never cancel the TaskGroup.
+    # Nothing in the run reads further back than --window, so order-log rows
+    # older than that are dropped here to keep memory bounded.
+    try:
+        await cycle(ex, args.symbol, own)
+        report_metrics(ex, args.window)
+        if isinstance(ex, SimExchange):
+            ex.trim_order_log(time.monotonic_ns() - round(args.window * 1e9))
+    except Exception as e:
+        log.exception("Cycle error: %s", e)
+        await asyncio.sleep(5.0)
+    finally:
+        slots.release()
 
 
 ###############################################################################
 # CLI
 ###############################################################################
-def parse_cli() -> argparse.Namespace:
+def _positive_int(text: str) -> int:
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {text!r}") from None
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1, got {value}")
+    return value
+
+
+def _finite_float(text: str) -> float:
+    try:
+        value = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid float value: {text!r}") from None
+    if not math.isfinite(value):
+        raise argparse.ArgumentTypeError(f"must be finite, got {text}")
+    return value
+
+
+def parse_cli(argv: Optional[List[str]] = None) -> argparse.Namespace:
     # Define command-line flags for mode, symbol, spoof layers, timing, etc.
     p = argparse.ArgumentParser(description="Spoof‑sim test harness")
     p.add_argument("--mode", choices=["sim", "live"], default="sim")
     p.add_argument("--symbol", default="BTC/USDT")
     p.add_argument("--layers", type=int, default=3)
-    p.add_argument("--layer-size", type=float, default=5.0)
-    p.add_argument("--offset", type=float, default=0.5)
-    p.add_argument("--hold", type=float, default=0.2)
-    p.add_argument("--delay", type=float, default=0.05)
-    p.add_argument("--pause", type=float, default=2.0, help="pause between cycles")
-    return p.parse_args()
+    p.add_argument("--layer-size", type=_finite_float, default=5.0)
+    p.add_argument("--offset", type=_finite_float, default=0.5)
+    p.add_argument("--hold", type=_finite_float, default=0.2)
+    p.add_argument("--delay", type=_finite_float, default=0.05)
+    p.add_argument(
+        "--pause", type=_finite_float, default=2.0, help="pause between cycles"
+    )
+    p.add_argument(
+        "--concurrency", type=_positive_int, default=1, help="max overlapping cycles"
+    )
+    p.add_argument(
+        "--window",
+        type=_finite_float,
+        default=60.0,
+        help="detector look-back (seconds)",
+    )
+    return p.parse_args(argv)
 
 
 ###############################################################################
 # Entry‑point
 ###############################################################################
+def _queue_logging() -> QueueListener:
+    # Put the root handlers behind a QueueHandler so log I/O runs on the
+    # listener thread instead of stalling the event loop mid-cycle.
+    root = logging.getLogger()
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(q, *root.handlers, respect_handler_level=True)
+    root.handlers = [QueueHandler(q)]
+    listener.start()
+    return listener
+
+
 def main() -> None:
-    # Parse CLI arguments and run the spoofing strategy loop until interrupted.
+    # Parse CLI arguments and run the spoofing strategy loop until interrupted,
+    # on uvloop when it is installed.
     args = parse_cli()
     try:
-        asyncio.run(run_strategy(args))
+        import uvloop
+    except ImportError:
+        uvloop = None
+    loop_factory = uvloop.new_event_loop if uvloop is not None else None
+    listener = _queue_logging()
+    try:
+        with asyncio.Runner(loop_factory=loop_factory) as runner:
+            runner.run(run_strategy(args))
     except KeyboardInterrupt:
         pass
+    finally:
+        listener.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,69 @@
+"""
+Spoof‑detection metrics
+=======================
+
+Numeric kernels that run over ``SimExchange``'s columnar order log
+(``SimExchange.orders_view()``).  They are compiled with Numba when it is
+installed; otherwise the same loops run as plain Python, so the simulator
+keeps working without any third‑party packages.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Sequence, Tuple
+
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:  # pure‑Python fallback: identical results, no JIT
+    np = None
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+
+# Column encodings shared with SimExchange's order log.
+SIDE_BUY = 0
+SIDE_SELL = 1
+FILLED = 1
+CANCELLED = 2
+
+
+@njit(cache=True)
+def _cancel_counts(sides, statuses, start, done, cancelled):
+    # Tally retired / cancelled orders per side over rows [start, n).
+    for i in range(start, len(sides)):
+        side = sides[i]
+        done[side] += 1
+        if statuses[i] == CANCELLED:
+            cancelled[side] += 1
+
+
+def rolling_cancel_ratio(
+    ts: Sequence[int],
+    sides: Sequence[int],
+    statuses: Sequence[int],
+    window: int,
+) -> Tuple[float, float]:
+    # Fraction of orders that left the book by cancellation, as (bid, ask),
+    # over the trailing `window` (same unit as `ts`, normally monotonic ns)
+    # ending at the newest row.  `ts` must be ascending, as SimExchange's
+    # order log is, so the window start is a bisection and only rows inside
+    # the window are visited.  0.0 when a side is idle.
+    if len(ts) == 0:
+        return 0.0, 0.0
+    start = bisect_left(ts, ts[-1] - window)
+    if np is not None:
+        sides, statuses = np.asarray(sides), np.asarray(statuses)
+        done = np.zeros(2, np.int64)
+        cancelled = np.zeros(2, np.int64)
+    else:
+        done = [0, 0]
+        cancelled = [0, 0]
+    _cancel_counts(sides, statuses, start, done, cancelled)
+    bid = cancelled[SIDE_BUY] / done[SIDE_BUY] if done[SIDE_BUY] else 0.0
+    ask = cancelled[SIDE_SELL] / done[SIDE_SELL] if done[SIDE_SELL] else 0.0
+    return float(bid), float(ask)
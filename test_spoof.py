@@ -0,0 +1,366 @@
+import argparse
+import asyncio
+import itertools
+import random
+import time
+
+import pytest
+
+import spoof
+from spoof import (
+    PRICE_TICK,
+    SIZE_LOT,
+    Side,
+    SimExchange,
+    _PriceLevels,
+    _acquire_or_cancel,
+    _run_cycle,
+    make_spoof_cycle,
+    parse_cli,
+    report_metrics,
+    spoof_cycle,
+)
+from spoof_metrics import CANCELLED, FILLED, SIDE_BUY, SIDE_SELL
+
+
+def _place(ex, side, price, size, cid):
+    return asyncio.run(ex.place_limit("X", side, price, size, cid))
+
+
+def _top(ex):
+    return asyncio.run(ex.get_top("X"))
+
+
+def _trades(ex):
+    px, sz, _ = ex.trades_view()
+    return list(zip(px, sz))
+
+
+def test_empty_book_uses_fallback_quotes():
+    assert _top(SimExchange()) == (49_999.5, 50_000.5)
+
+
+def test_crossing_order_trades_at_integer_midpoint():
+    ex = SimExchange()
+    _place(ex, Side.BUY, 100.0, 1.0, "b1")
+    _place(ex, Side.SELL, 99.99, 1.0, "s1")
+    assert _trades(ex) == [((10_000 + 9_999) >> 1, SIZE_LOT)]
+    assert ex.get_order("b1") is None and ex.get_order("s1") is None
+    assert _top(ex) == (49_999.5, 50_000.5)
+    _, sides, statuses = ex.orders_view()
+    assert sorted(sides) == [SIDE_BUY, SIDE_SELL] and list(statuses) == [FILLED] * 2
+
+
+def test_price_levels_peek_and_pop_best_first():
+    levels = _PriceLevels()
+    for key in [5, -3, 9, 0, 7]:
+        levels.level(key).append(key)
+    levels.discard(7)
+    assert [key for key, _ in levels] == [-3, 0, 5, 9]
+    assert levels.peekitem()[0] == -3
+    assert [levels.popitem()[0] for _ in range(4)] == [-3, 0, 5, 9]
+    assert not levels
+
+
+def test_non_crossing_orders_rest_best_first():
+    ex = SimExchange()
+    _place(ex, Side.BUY, 100.0, 1.0, "b1")
+    _place(ex, Side.BUY, 101.0, 1.0, "b2")
+    _place(ex, Side.SELL, 103.0, 1.0, "s1")
+    _place(ex, Side.SELL, 102.0, 1.0, "s2")
+    assert _trades(ex) == []
+    assert _top(ex) == (101.0, 102.0)
+
+
+def test_partial_fills_sweep_levels_and_rest_residual():
+    ex = SimExchange()
+    _place(ex, Side.BUY, 101.0, 1.0, "b1")
+    _place(ex, Side.BUY, 100.0, 1.0, "b2")
+    # Sells through b1 fully, takes half of b2, nothing left to rest.
+    _place(ex, Side.SELL, 100.0, 1.5, "s1")
+    assert _trades(ex) == [(10_050, SIZE_LOT), (10_000, SIZE_LOT // 2)]
+    b2 = ex.get_order("b2")
+    assert b2.filled == SIZE_LOT // 2 and b2.status == "open"
+    assert ex.get_order("s1") is None
+    assert _top(ex) == (100.0, 50_000.5)
+
+    # Aggressor larger than the book: fills b2's remainder, rests the rest.
+    _place(ex, Side.SELL, 99.0, 1.0, "s2")
+    s2 = ex.get_order("s2")
+    assert s2.price == 99 * PRICE_TICK and s2.filled == SIZE_LOT // 2
+    assert _top(ex) == (49_999.5, 99.0)
+
+
+def test_trades_view_copies_rows_from_cursor():
+    ex = SimExchange()
+    _place(ex, Side.BUY, 100.0, 2.0, "b1")
+    _place(ex, Side.SELL, 100.0, 1.0, "s1")
+    px, _, _ = ex.trades_view()
+    seen = len(px)
+    held = memoryview(px)
+    _place(ex, Side.SELL, 100.0, 0.5, "s2")
+    new_px, new_sz, _ = ex.trades_view(seen)
+    assert list(new_px) == [10_000] and list(new_sz) == [SIZE_LOT // 2]
+    assert len(held) == 1
+
+
+def test_time_priority_within_level():
+    ex = SimExchange()
+    _place(ex, Side.BUY, 100.0, 1.0, "first")
+    _place(ex, Side.BUY, 100.0, 1.0, "second")
+    _place(ex, Side.SELL, 100.0, 1.0, "s1")
+    assert ex.get_order("first") is None
+    assert ex.get_order("second").filled == 0
+
+
+def test_cancel_refreshes_top_and_logs_order():
+    ex = SimExchange()
+    _place(ex, Side.BUY, 100.0, 1.0, "b1")
+    _place(ex, Side.BUY, 101.0, 1.0, "b2")
+    asyncio.run(ex.cancel("b2"))
+    asyncio.run(ex.cancel("unknown"))
+    assert ex.get_order("b2") is None
+    assert _top(ex) == (100.0, 50_000.5)
+    _, sides, statuses = ex.orders_view()
+    assert list(sides) == [SIDE_BUY] and list(statuses) == [CANCELLED]
+
+
+def test_place_limit_batch_places_each_order():
+    ex = SimExchange()
+    ids = asyncio.run(
+        ex.place_limit_batch("X", Side.BUY, [100.0, 99.5], [1.0, 2.0], ["b1", "b2"])
+    )
+    assert ids == ["b1", "b2"]
+    assert ex.get_order("b2").size == 2 * SIZE_LOT
+    assert _top(ex) == (100.0, 50_000.5)
+
+
+def test_cancel_batch_sweeps_shared_and_emptied_levels():
+    ex = SimExchange()
+    for i, px in enumerate([101.0, 101.0, 101.0, 100.0]):
+        _place(ex, Side.BUY, px, 1.0, f"b{i}")
+    asyncio.run(ex.cancel_batch(["b0", "b2", "b3", "missing"]))
+    assert [ex.get_order(f"b{i}") is None for i in range(4)] == [
+        True,
+        False,
+        True,
+        True,
+    ]
+    assert _top(ex) == (101.0, 50_000.5)
+    asyncio.run(ex.cancel_batch(["b1"]))
+    assert _top(ex) == (49_999.5, 50_000.5)
+    assert list(ex.orders_view()[2]) == [CANCELLED] * 4
+
+
+def test_order_log_is_sorted_and_trimmed_to_window():
+    ex = SimExchange()
+    _place(ex, Side.BUY, 100.0, 1.0, "b1")
+    _place(ex, Side.BUY, 100.0, 1.0, "b2")
+    # A stale caller-supplied ts is clamped so the log stays sorted.
+    asyncio.run(ex.place_limit("X", Side.SELL, 100.0, 1.0, "s1", ts=0))
+    asyncio.run(ex.cancel("b2"))
+    ts, _, statuses = ex.orders_view()
+    assert list(ts) == sorted(ts) and list(statuses) == [FILLED, FILLED, CANCELLED]
+    assert len(ex.orders_view(since=ts[-1])[0]) == 1
+
+    ex.trim_order_log(ts[-1])
+    assert list(ex.orders_view()[2]) == [CANCELLED]
+
+
+def test_report_metrics_reads_log_and_runner_trims_it():
+    ex = SimExchange()
+    _place(ex, Side.BUY, 100.0, 1.0, "b1")
+    asyncio.run(ex.cancel("b1"))
+    time.sleep(0.01)
+    report_metrics(ex, window=0.001)
+    assert len(ex.orders_view()[0]) == 1
+
+    async def cycle(ex, symbol, own):
+        pass
+
+    args = argparse.Namespace(symbol="X", window=0.001)
+    asyncio.run(_run_cycle(cycle, ex, args, asyncio.Semaphore(0), set()))
+    assert len(ex.orders_view()[0]) == 0
+
+
+async def _random_workload(ex, seed, n, batch_cancel, check_top=False):
+    rng = random.Random(seed)
+    live = []
+    for i in range(n):
+        if live and rng.random() < 0.25:
+            k = rng.randint(1, min(4, len(live)))
+            grp = [live.pop(rng.randrange(len(live))) for _ in range(k)]
+            if batch_cancel:
+                await ex.cancel_batch(grp)
+            else:
+                for oid in grp:
+                    await ex.cancel(oid)
+        else:
+            side = rng.choice([Side.BUY, Side.SELL])
+            px = round(rng.uniform(99.0, 101.0), 2)
+            await ex.place_limit("X", side, px, rng.choice([0.5, 1.0, 2.0]), f"o{i}")
+            live.append(f"o{i}")
+        if check_top:
+            resting = [ex.get_order(oid) for oid in ex.orders_by_id]
+            bids = [o.price for o in resting if o.side == Side.BUY]
+            asks = [o.price for o in resting if o.side == Side.SELL]
+            bid = max(bids) / PRICE_TICK if bids else 49_999.5
+            ask = min(asks) / PRICE_TICK if asks else 50_000.5
+            assert await ex.get_top("X") == (bid, ask)
+            assert not (bids and asks) or max(bids) < min(asks)
+
+
+def _summary(ex):
+    px, sz, _ = ex.trades_view()
+    _, sides, statuses = ex.orders_view()
+    return (
+        list(px),
+        list(sz),
+        list(sides),
+        list(statuses),
+        asyncio.run(ex.get_top("X")),
+        sorted(ex.orders_by_id),
+    )
+
+
+def test_cached_top_matches_book_under_random_workload():
+    asyncio.run(_random_workload(SimExchange(), 7, 2_000, True, check_top=True))
+
+
+def test_cancel_batch_matches_individual_cancels():
+    single, batch = SimExchange(), SimExchange()
+    asyncio.run(_random_workload(single, 3, 3_000, batch_cancel=False))
+    asyncio.run(_random_workload(batch, 3, 3_000, batch_cancel=True))
+    assert _summary(single) == _summary(batch)
+
+
+def test_seeded_workload_regression():
+    # Totals recorded from the Order-object engine before the order-table
+    # rewrite; any change in matching behaviour shows up here.
+    ex = SimExchange()
+    asyncio.run(_random_workload(ex, 1, 5_000, batch_cancel=False))
+    px, sz, sides, statuses, top, _ = _summary(ex)
+    assert (len(px), sum(px), sum(sz)) == (2_164, 21_634_340, 1_659_000_000)
+    assert (len(statuses), sum(sides), statuses.count(FILLED)) == (3_621, 1_824, 2_810)
+    assert top == (99.42, 100.22)
+
+
+def test_get_top_excludes_own_orders():
+    ex = SimExchange()
+    _place(ex, Side.BUY, 101.0, 1.0, "mine")
+    _place(ex, Side.BUY, 100.0, 1.0, "theirs")
+    _place(ex, Side.BUY, 100.0, 1.0, "mine2")
+    _place(ex, Side.SELL, 102.0, 1.0, "ask")
+    top = asyncio.run(ex.get_top("X", exclude={"mine", "mine2"}))
+    assert top == (100.0, 102.0)
+    top = asyncio.run(ex.get_top("X", exclude={"mine", "theirs", "ask"}))
+    assert top == (100.0, 50_000.5)
+
+
+class _RecordingExchange(SimExchange):
+    def __init__(self):
+        super().__init__()
+        self.quotes = []
+
+    async def get_top(self, symbol, exclude=()):
+        top = await super().get_top(symbol, exclude)
+        self.quotes.append(top)
+        return top
+
+
+@pytest.mark.parametrize("generated", [False, True])
+def test_overlapping_cycles_do_not_trade_with_each_other(generated):
+    # K>1: later cycles start while earlier spoofs still rest, and must
+    # neither quote off them nor sell into them.
+    params = dict(layers=3, layer_size=1.0, price_offset=0.5, hold=0.02)
+    if generated:
+        cycle = make_spoof_cycle(exec_delay=0.005, **params)
+    else:
+
+        async def cycle(ex, symbol, own):
+            await spoof_cycle(ex, symbol, exec_delay=0.005, own=own, **params)
+
+    async def run(ex, own):
+        async with asyncio.TaskGroup() as tg:
+            for _ in range(40):
+                tg.create_task(cycle(ex, "X", own))
+                await asyncio.sleep(0.002)
+
+    ex, own = _RecordingExchange(), set()
+    asyncio.run(run(ex, own))
+    assert _trades(ex) == []
+    assert {bid for bid, _ in ex.quotes} == {49_999.5}
+    assert own == set() and ex.orders_by_id.keys() == {
+        oid for oid in ex.orders_by_id if oid.startswith("real_")
+    }
+
+
+def test_acquire_or_cancel_wakes_on_shutdown():
+    async def run():
+        slots, cancel = asyncio.Semaphore(1), asyncio.Event()
+        assert await _acquire_or_cancel(slots, cancel)
+        waiter = asyncio.create_task(_acquire_or_cancel(slots, cancel))
+        await asyncio.sleep(0)
+        cancel.set()
+        assert await asyncio.wait_for(waiter, 1.0) is False
+        # The first holder still has the only slot.
+        assert slots.locked()
+        slots.release()
+        assert not slots.locked()
+        # A slot freed at shutdown is handed back, not kept.
+        assert await _acquire_or_cancel(slots, cancel) is False
+        assert not slots.locked()
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("value", ["0", "-1", "x"])
+def test_cli_rejects_bad_concurrency(value):
+    with pytest.raises(SystemExit):
+        parse_cli(["--concurrency", value])
+    assert parse_cli(["--concurrency", "4"]).concurrency == 4
+
+
+async def _parity_run(ex, cycle):
+    for side, px, cid in [(Side.BUY, 100.0, "b"), (Side.SELL, 101.0, "a")]:
+        await ex.place_limit("X", side, px, 0.05, cid)
+    own = set()
+    for _ in range(8):
+        await cycle(ex, "X", own)
+    return ex
+
+
+@pytest.mark.parametrize("layers, offset", [(0, 0.5), (4, 0.25), (3, 0.1)])
+def test_generated_cycle_matches_spoof_cycle(monkeypatch, layers, offset):
+    params = dict(
+        layers=layers, layer_size=2.0, price_offset=offset, hold=0.0, exec_delay=0.0
+    )
+
+    async def reference(ex, symbol, own):
+        await spoof_cycle(ex, symbol, own=own, **params)
+
+    monkeypatch.setattr(spoof, "_cid_ctr", itertools.count())
+    expected = _summary(asyncio.run(_parity_run(SimExchange(), reference)))
+    monkeypatch.setattr(spoof, "_cid_ctr", itertools.count())
+    generated = make_spoof_cycle(**params)
+    actual = _summary(asyncio.run(_parity_run(SimExchange(), generated)))
+    assert actual == expected and len(actual[0]) > 0
+
+
+def test_generated_cycle_bakes_in_constants():
+    cycle = make_spoof_cycle(3, 2.0, 0.25, 0.5, 0.125)
+    consts = cycle.__code__.co_consts
+    assert {0.25, 0.5, 0.75, 0.125} <= set(consts) and not cycle.__code__.co_freevars
+
+
+@pytest.mark.parametrize("bad", [float("inf"), float("-inf"), float("nan")])
+def test_generated_cycle_rejects_non_finite_values(bad):
+    with pytest.raises(ValueError):
+        make_spoof_cycle(3, 1.0, bad, 0.1, 0.1)
+
+
+@pytest.mark.parametrize("flag", ["--offset", "--hold", "--pause", "--window"])
+@pytest.mark.parametrize("value", ["inf", "nan", "-inf"])
+def test_cli_rejects_non_finite_floats(flag, value):
+    with pytest.raises(SystemExit):
+        parse_cli([flag, value])
@@ -0,0 +1,38 @@
+from array import array
+
+import pytest
+
+import spoof_metrics
+from spoof_metrics import CANCELLED, FILLED, SIDE_BUY, SIDE_SELL, rolling_cancel_ratio
+
+
+def test_empty_log():
+    assert rolling_cancel_ratio([], [], [], 10) == (0.0, 0.0)
+
+
+def test_ratio_per_side():
+    ts = [1, 2, 3, 4, 5]
+    sides = [SIDE_BUY, SIDE_BUY, SIDE_BUY, SIDE_SELL, SIDE_BUY]
+    statuses = [CANCELLED, FILLED, CANCELLED, FILLED, CANCELLED]
+    assert rolling_cancel_ratio(ts, sides, statuses, 100) == (0.75, 0.0)
+
+
+def test_window_ends_at_newest_row():
+    ts = array("q", [0, 10, 20, 30])
+    sides = array("b", [SIDE_BUY] * 4)
+    statuses = array("b", [FILLED, FILLED, CANCELLED, CANCELLED])
+    assert rolling_cancel_ratio(ts, sides, statuses, 10) == (1.0, 0.0)
+    assert rolling_cancel_ratio(ts, sides, statuses, 30) == (0.5, 0.0)
+
+
+def test_numba_kernel_matches_python():
+    pytest.importorskip("numba")
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(0)
+    sides = rng.integers(0, 2, 1_000).astype(np.int8)
+    statuses = rng.choice([FILLED, CANCELLED], 1_000).astype(np.int8)
+    got = (np.zeros(2, np.int64), np.zeros(2, np.int64))
+    want = (np.zeros(2, np.int64), np.zeros(2, np.int64))
+    spoof_metrics._cancel_counts(sides, statuses, 100, *got)
+    spoof_metrics._cancel_counts.py_func(sides, statuses, 100, *want)
+    assert (got[0] == want[0]).all() and (got[1] == want[1]).all()